@@ -50,25 +50,25 @@ class ToolExecutor(RunnableBinding):
     def _execute(
         self, tool_invocation: ToolInvocationInterface, *, config: RunnableConfig
     ) -> Any:
-        if tool_invocation.tool not in self.tool_map:
+        tool = self.tool_map.get(tool_invocation.tool)
+        if tool is None:
             return self.invalid_tool_msg_template.format(
                 requested_tool_name=tool_invocation.tool,
                 available_tool_names_str=", ".join([t.name for t in self.tools]),
             )
         else:
-            tool = self.tool_map[tool_invocation.tool]
             output = tool.invoke(tool_invocation.tool_input, config=config)
             return output
 
     async def _aexecute(
         self, tool_invocation: ToolInvocationInterface, *, config: RunnableConfig
     ) -> Any:
-        if tool_invocation.tool not in self.tool_map:
+        tool = self.tool_map.get(tool_invocation.tool)
+        if tool is None:
             return self.invalid_tool_msg_template.format(
                 requested_tool_name=tool_invocation.tool,
                 available_tool_names_str=", ".join([t.name for t in self.tools]),
             )
         else:
-            tool = self.tool_map[tool_invocation.tool]
             output = await tool.ainvoke(tool_invocation.tool_input, config=config)
             return output
@@ -0,0 +1,59 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.tools import BaseTool, tool
+
+
+@pytest.fixture(scope="session")
+def executor() -> Iterator[ThreadPoolExecutor]:
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        yield executor
+
+
+@pytest.fixture(scope="session")
+def search_api() -> BaseTool:
+    # tools are stateless, so building the schema once is enough
+    @tool()
+    def search_api(query: str) -> str:
+        """Searches the API for the query."""
+        return f"result for {query}"
+
+    return search_api
+
+
+@pytest.fixture
+def chat_model() -> BaseChatModel:
+    from langchain.chat_models.fake import FakeMessagesListChatModel
+
+    class FakeFuntionChatModel(FakeMessagesListChatModel):
+        def bind_functions(self, functions: list):
+            return self
+
+    # fresh per test, the fake keeps track of which response is next
+    return FakeFuntionChatModel(
+        responses=[
+            AIMessage(
+                content="",
+                additional_kwargs={
+                    "function_call": {
+                        "name": "search_api",
+                        "arguments": json.dumps("query"),
+                    }
+                },
+            ),
+            AIMessage(
+                content="",
+                additional_kwargs={
+                    "function_call": {
+                        "name": "search_api",
+                        "arguments": json.dumps("another"),
+                    }
+                },
+            ),
+            AIMessage(content="answer"),
+        ]
+    )
@@ -14,7 +14,9 @@ from typing import (
 )
 
 import pytest
+from langchain_core.language_models import BaseChatModel
 from langchain_core.runnables import RunnablePassthrough
+from langchain_core.tools import BaseTool
 from pytest_mock import MockerFixture
 
 from langgraph.channels.base import InvalidUpdateError
@@ -310,7 +312,8 @@ async def test_invoke_two_processes_in_dict_out(mocker: MockerFixture) -> None:
 
 async def test_batch_two_processes_in_out() -> None:
     async def add_one_with_delay(inp: int) -> int:
-        await asyncio.sleep(inp / 10)
+        # staggered delays so batch items finish out of order
+        await asyncio.sleep(inp / 1000)
         return inp + 1
 
     one = Channel.subscribe_to("input") | add_one_with_delay | Channel.write_to("one")
@@ -341,6 +344,7 @@ async def test_batch_two_processes_in_out() -> None:
     assert await gapp.abatch([3, 2, 1, 3, 5]) == [5, 4, 3, 5, 7]
 
 
+@pytest.mark.slow
 async def test_invoke_many_processes_in_out(mocker: MockerFixture) -> None:
     test_size = 100
     add_one = mocker.Mock(side_effect=lambda x: x + 1)
@@ -364,6 +368,7 @@ async def test_invoke_many_processes_in_out(mocker: MockerFixture) -> None:
     ) == [2 + test_size for _ in range(10)]
 
 
+@pytest.mark.slow
 async def test_batch_many_processes_in_out(mocker: MockerFixture) -> None:
     test_size = 100
     add_one = mocker.Mock(side_effect=lambda x: x + 1)
@@ -530,6 +535,7 @@ async def test_invoke_checkpoint_sqlite(mocker: MockerFixture) -> None:
     await memory.conn.close()
 
 
+@pytest.mark.slow
 async def test_invoke_two_processes_two_in_join_two_out(mocker: MockerFixture) -> None:
     add_one = mocker.Mock(side_effect=lambda x: x + 1)
     add_10_each = mocker.Mock(side_effect=lambda x: sorted(y + 10 for y in x))
@@ -697,21 +703,15 @@ async def test_channel_enter_exit_timing(mocker: MockerFixture) -> None:
     assert cleanup_async.call_count == 1, "Expected cleanup to be called once"
 
 
-async def test_conditional_graph() -> None:
+async def test_conditional_graph(search_api: BaseTool) -> None:
     from copy import deepcopy
 
     from langchain.llms.fake import FakeStreamingListLLM
-    from langchain_community.tools import tool
     from langchain_core.agents import AgentAction, AgentFinish
     from langchain_core.prompts import PromptTemplate
     from langchain_core.runnables import RunnablePassthrough
 
     # Assemble the tools
-    @tool()
-    def search_api(query: str) -> str:
-        """Searches the API for the query."""
-        return f"result for {query}"
-
     tools = [search_api]
 
     # Construct the agent
@@ -735,12 +735,12 @@ async def test_conditional_graph() -> None:
 
     agent = RunnablePassthrough.assign(agent_outcome=prompt | llm | agent_parser)
 
+    tool_executor = ToolExecutor(tools)
+
     # Define tool execution logic
     async def execute_tools(data: dict) -> dict:
         agent_action: AgentAction = data.pop("agent_outcome")
-        observation = await {t.name: t for t in tools}[agent_action.tool].ainvoke(
-            agent_action.tool_input
-        )
+        observation = await tool_executor.ainvoke(agent_action)
         if data.get("intermediate_steps") is None:
             data["intermediate_steps"] = []
         data["intermediate_steps"].append((agent_action, observation))
@@ -925,23 +925,17 @@ async def test_conditional_graph() -> None:
     assert "/logs/agent/streamed_output/-" in patch_paths
 
 
-async def test_conditional_graph_state() -> None:
+async def test_conditional_graph_state(search_api: BaseTool) -> None:
     from langchain.llms.fake import FakeStreamingListLLM
-    from langchain_community.tools import tool
     from langchain_core.agents import AgentAction, AgentFinish
     from langchain_core.prompts import PromptTemplate
 
     class AgentState(TypedDict):
         input: str
-        agent_outcome: Optional[Union[AgentAction, AgentFinish]]
+        agent_outcome: Optional[Union[AgentAction, list[AgentAction], AgentFinish]]
         intermediate_steps: Annotated[list[tuple[AgentAction, str]], operator.add]
 
     # Assemble the tools
-    @tool()
-    def search_api(query: str) -> str:
-        """Searches the API for the query."""
-        return f"result for {query}"
-
     tools = [search_api]
 
     # Construct the agent
@@ -949,13 +943,14 @@ async def test_conditional_graph_state() -> None:
 
     llm = FakeStreamingListLLM(
         responses=[
-            "tool:search_api:query",
-            "tool:search_api:another",
+            "tool:search_api:query;tool:search_api:another",
             "finish:answer",
         ]
     )
 
-    def agent_parser(input: str) -> dict[str, Union[AgentAction, AgentFinish]]:
+    def agent_parser(
+        input: str,
+    ) -> dict[str, Union[AgentAction, list[AgentAction], AgentFinish]]:
         if input.startswith("finish"):
             _, answer = input.split(":")
             return {
@@ -964,22 +959,26 @@ async def test_conditional_graph_state() -> None:
                 )
             }
         else:
-            _, tool_name, tool_input = input.split(":")
-            return {
-                "agent_outcome": AgentAction(
-                    tool=tool_name, tool_input=tool_input, log=input
+            # several actions can be requested at once, separated by ";"
+            actions = []
+            for step in input.split(";"):
+                _, tool_name, tool_input = step.split(":")
+                actions.append(
+                    AgentAction(tool=tool_name, tool_input=tool_input, log=step)
                 )
-            }
+            return {"agent_outcome": actions if len(actions) > 1 else actions[0]}
 
     agent = prompt | llm | agent_parser
 
+    tool_executor = ToolExecutor(tools)
+
     # Define tool execution logic
-    def execute_tools(data: AgentState) -> dict:
-        agent_action: AgentAction = data.pop("agent_outcome")
-        observation = {t.name: t for t in tools}[agent_action.tool].invoke(
-            agent_action.tool_input
-        )
-        return {"intermediate_steps": [(agent_action, observation)]}
+    async def execute_tools(data: AgentState) -> dict:
+        outcome = data["agent_outcome"]
+        # Independent actions requested together are executed concurrently
+        actions = outcome if isinstance(outcome, list) else [outcome]
+        observations = await tool_executor.abatch(actions)
+        return {"intermediate_steps": list(zip(actions, observations))}
 
     # Define decision-making logic
     def should_continue(data: AgentState) -> str:
@@ -1030,12 +1029,22 @@ async def test_conditional_graph_state() -> None:
         ),
     }
 
+    # both actions come from a single agent step and run in one tools step
     assert [c async for c in app.astream({"input": "what is weather in sf"})] == [
         {
             "agent": {
-                "agent_outcome": AgentAction(
-                    tool="search_api", tool_input="query", log="tool:search_api:query"
-                ),
+                "agent_outcome": [
+                    AgentAction(
+                        tool="search_api",
+                        tool_input="query",
+                        log="tool:search_api:query",
+                    ),
+                    AgentAction(
+                        tool="search_api",
+                        tool_input="another",
+                        log="tool:search_api:another",
+                    ),
+                ],
             }
         },
         {
@@ -1048,22 +1057,7 @@ async def test_conditional_graph_state() -> None:
                             log="tool:search_api:query",
                         ),
                         "result for query",
-                    )
-                ],
-            }
-        },
-        {
-            "agent": {
-                "agent_outcome": AgentAction(
-                    tool="search_api",
-                    tool_input="another",
-                    log="tool:search_api:another",
-                ),
-            }
-        },
-        {
-            "tools": {
-                "intermediate_steps": [
+                    ),
                     (
                         AgentAction(
                             tool="search_api",
@@ -1111,48 +1105,12 @@ async def test_conditional_graph_state() -> None:
     ]
 
 
-async def test_prebuilt_chat() -> None:
-    from langchain.chat_models.fake import FakeMessagesListChatModel
-    from langchain_community.tools import tool
+async def test_prebuilt_chat(chat_model: BaseChatModel, search_api: BaseTool) -> None:
     from langchain_core.messages import AIMessage, FunctionMessage, HumanMessage
 
-    class FakeFuntionChatModel(FakeMessagesListChatModel):
-        def bind_functions(self, functions: list):
-            return self
-
-    @tool()
-    def search_api(query: str) -> str:
-        """Searches the API for the query."""
-        return f"result for {query}"
-
     tools = [search_api]
 
-    app = create_function_calling_executor(
-        FakeFuntionChatModel(
-            responses=[
-                AIMessage(
-                    content="",
-                    additional_kwargs={
-                        "function_call": {
-                            "name": "search_api",
-                            "arguments": json.dumps("query"),
-                        }
-                    },
-                ),
-                AIMessage(
-                    content="",
-                    additional_kwargs={
-                        "function_call": {
-                            "name": "search_api",
-                            "arguments": json.dumps("another"),
-                        }
-                    },
-                ),
-                AIMessage(content="answer"),
-            ]
-        ),
-        tools,
-    )
+    app = create_function_calling_executor(chat_model, tools)
 
     assert await app.ainvoke(
         {"messages": [HumanMessage(content="what is weather in sf")]}
@@ -1259,54 +1217,24 @@ async def test_prebuilt_chat() -> None:
     ]
 
 
-async def test_message_graph() -> None:
-    from langchain.chat_models.fake import FakeMessagesListChatModel
-    from langchain_community.tools import tool
+async def test_message_graph(chat_model: BaseChatModel, search_api: BaseTool) -> None:
     from langchain_core.agents import AgentAction
-    from langchain_core.messages import AIMessage, FunctionMessage, HumanMessage
-
-    class FakeFuntionChatModel(FakeMessagesListChatModel):
-        def bind_functions(self, functions: list):
-            return self
-
-    @tool()
-    def search_api(query: str) -> str:
-        """Searches the API for the query."""
-        return f"result for {query}"
+    from langchain_core.messages import (
+        AIMessage,
+        FunctionMessage,
+        HumanMessage,
+        ToolMessage,
+    )
 
     tools = [search_api]
 
-    model = FakeFuntionChatModel(
-        responses=[
-            AIMessage(
-                content="",
-                additional_kwargs={
-                    "function_call": {
-                        "name": "search_api",
-                        "arguments": json.dumps("query"),
-                    }
-                },
-            ),
-            AIMessage(
-                content="",
-                additional_kwargs={
-                    "function_call": {
-                        "name": "search_api",
-                        "arguments": json.dumps("another"),
-                    }
-                },
-            ),
-            AIMessage(content="answer"),
-        ]
-    )
-
     tool_executor = ToolExecutor(tools)
 
     # Define the function that determines whether to continue or not
     def should_continue(messages):
-        last_message = messages[-1]
+        kwargs = messages[-1].additional_kwargs
         # If there is no function call, then we finish
-        if "function_call" not in last_message.additional_kwargs:
+        if "function_call" not in kwargs and "tool_calls" not in kwargs:
             return "end"
         # Otherwise if there is, we continue
         else:
@@ -1314,14 +1242,29 @@ async def test_message_graph() -> None:
 
     async def call_tool(messages):
         # Based on the continue condition
-        # we know the last message involves a function call
-        last_message = messages[-1]
+        # we know the last message involves one or more function calls
+        kwargs = messages[-1].additional_kwargs
+        if "tool_calls" in kwargs:
+            tool_calls = kwargs["tool_calls"]
+            actions = [
+                AgentAction(
+                    tool=tool_call["function"]["name"],
+                    tool_input=json.loads(tool_call["function"]["arguments"]),
+                    log="",
+                )
+                for tool_call in tool_calls
+            ]
+            # Independent calls requested together are executed concurrently
+            responses = await tool_executor.abatch(actions)
+            # Each response is matched to its call through the call's id
+            return [
+                ToolMessage(content=str(response), tool_call_id=tool_call["id"])
+                for tool_call, response in zip(tool_calls, responses)
+            ]
         # We construct an AgentAction from the function_call
         action = AgentAction(
-            tool=last_message.additional_kwargs["function_call"]["name"],
-            tool_input=json.loads(
-                last_message.additional_kwargs["function_call"]["arguments"]
-            ),
+            tool=kwargs["function_call"]["name"],
+            tool_input=json.loads(kwargs["function_call"]["arguments"]),
             log="",
         )
         # We call the tool_executor and get back a response
@@ -1333,7 +1276,7 @@ async def test_message_graph() -> None:
     workflow = MessageGraph()
 
     # Define the two nodes we will cycle between
-    workflow.add_node("agent", model)
+    workflow.add_node("agent", chat_model)
     workflow.add_node("action", call_tool)
 
     # Set the entrypoint as `agent`
@@ -1435,3 +1378,32 @@ async def test_message_graph() -> None:
             ]
         },
     ]
+
+    # several calls in one message are all answered by a single action step
+    assert await call_tool(
+        [
+            AIMessage(
+                content="",
+                additional_kwargs={
+                    "tool_calls": [
+                        {
+                            "id": "call_query",
+                            "type": "function",
+                            "function": {"name": "search_api", "arguments": '"query"'},
+                        },
+                        {
+                            "id": "call_another",
+                            "type": "function",
+                            "function": {
+                                "name": "search_api",
+                                "arguments": '"another"',
+                            },
+                        },
+                    ]
+                },
+            )
+        ]
+    ) == [
+        ToolMessage(content="result for query", tool_call_id="call_query"),
+        ToolMessage(content="result for another", tool_call_id="call_another"),
+    ]